@@ -1,8 +1,16 @@
 import os
+import re
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter, OrderedDict
+from urllib.parse import parse_qs
 import pandas as pd
 import pycountry
 from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from flask import g, request
 import plotly.express as px
 import dash_bootstrap_components as dbc
 from sklearn.linear_model import LinearRegression
@@ -15,24 +23,19 @@ import plotly.graph_objects as go
 
 # Dash app létrehozása
 app = Dash(__name__, external_stylesheets=[dbc.themes.FLATLY], suppress_callback_exceptions=True)
-# A program aktuális könyvtárának meghatározása és a fájl beolvasása
+# A Flask szerver kiajánlása WSGI szerverekhez (pl. gunicorn KG6A2S:server)
+server = app.server
+# A program aktuális könyvtárának meghatározása
 current_directory = os.path.dirname(os.path.abspath(__file__))
-file_name = '3_varhato_elettartam.csv'  # A fájl neve
-file_path = os.path.join(current_directory, file_name)
-
-# Fájl beolvasása és hibakezelés
-try:
-    data = pd.read_csv(file_path)
-    print("Fájl sikeresen beolvasva.")
-except FileNotFoundError:
-    data = pd.DataFrame()
-    print(f"A fájl nem található ezen az útvonalon: {file_path}")
-except Exception as e:
-    data = pd.DataFrame()
-    print(f"Hiba történt a fájl beolvasása közben: {e}")
-
-# Átalakítjuk a 'Life expectancy' oszlopot numerikus értékekre, ha szükséges
-data['Life expectancy '] = pd.to_numeric(data['Life expectancy '], errors='coerce')
+# Az adathalmazok könyvtára és az alapértelmezett fájl (környezeti változóval felülírható)
+data_directory = os.environ.get('ADATHALMAZ_KONYVTAR', current_directory)
+file_name = os.environ.get('ADATHALMAZ_ALAPERTELMEZETT', '3_varhato_elettartam.csv')  # Az alapértelmezett fájl neve
+# A betöltött adathalmazok együttes memóriakorlátja (MB)
+dataset_memory_limit = float(os.environ.get('ADATHALMAZ_MEMORIA_MB', 512)) * 2**20
+# A könyvtárlista újraolvasásának gyakorisága (másodperc); a módosított fájlok ennyi időn belül töltődnek újra
+dataset_listing_ttl = float(os.environ.get('ADATHALMAZ_LISTA_TTL', 10))
+# A megjelenítéshez szükséges oszlopok; csak az ezeket tartalmazó CSV fájlok választhatók
+required_columns = ['Country', 'Year', 'Status', 'Life expectancy ', 'GDP', 'Population']
 
 # Manuális országnevek és kódok átalakítása
 country_name_mapping = {
@@ -56,13 +59,338 @@ def get_country_code(name):
     except LookupError:
         return None
 
-# Országkód hozzáadása
-data['Country Code'] = data['Country'].apply(get_country_code)
 
-# Ellenőrizzük, hogy minden országnak sikerült-e az országkódot hozzárendelni
-if data['Country Code'].isnull().any():
-    missing_countries = data[data['Country Code'].isnull()]['Country'].unique()
-    print(f"Ezekhez az országokhoz nem találtunk kódot: {missing_countries}")
+# Az elemzett mutatók és magyar neveik; a legördülő menük, a diagramfeliratok és a korrelációs mátrix közös forrása
+indicator_translation = {
+    'GDP': 'GDP',
+    'Life expectancy ': 'Várható élettartam',
+    'Population': 'Népesség',
+    'Adult Mortality': 'Felnőttkori halálozás',
+    'infant deaths': 'Csecsemőhalálozás',
+    'Alcohol': 'Alkohol fogysztás',
+    'percentage expenditure': 'Kiadások aránya',
+    'Hepatitis B': 'Hepatitisz B oltottság',
+    'Measles ': 'Kanyaró',
+    ' BMI ': 'Átlagos testtömegindex',
+    'under-five deaths ': '5 éves kor alatti halálozás',
+    'Polio': 'Polio oltottság',
+    'Total expenditure': 'Állami eü kiadások',
+    'Diphtheria ': 'Diftéria oltottság',
+    ' HIV/AIDS': 'HIV/AIDS halálozások',
+    ' thinness  1-19 years': 'Soványság 1-19 éves',
+    ' thinness 5-9 years': 'Soványság 5-9 éves',
+    'Income composition of resources': 'Emberi fejlettség',
+    'Schooling': 'Iskolai évek száma',
+}
+
+
+# Páronkénti Pearson-korrelációs mátrix maszkolt mátrixszorzatokkal, O(sorok * változók) memóriával.
+# A hiányzó értékeket páronként hagyjuk ki: a (j, k) pár csak azokat a sorokat használja, ahol mindkettő ismert.
+def _pairwise_pearson(values, min_periods=3):
+    valid = ~np.isnan(values)
+    mask = valid.astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Oszloponkénti standardizálás, hogy az összegekből számolt szórásnál ne legyen kiejtés
+        count = np.maximum(valid.sum(axis=0), 1)
+        centered = np.where(valid, values - np.where(valid, values, 0).sum(axis=0) / count, 0.0)
+        scale = np.sqrt((centered ** 2).sum(axis=0) / count)
+        scaled = centered / np.where(scale > 0, scale, 1)
+
+        n = mask.T @ mask
+        sum_x = scaled.T @ mask  # sum_x[j, k]: a j. változó összege a (j, k) pár közös sorain
+        sum_xx = (scaled ** 2).T @ mask
+        sum_xy = scaled.T @ scaled
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = var_x.T
+        r = (sum_xy - sum_x * sum_x.T / n) / np.sqrt(var_x * var_y)
+
+    # Állandó változóra (a közös sorokon) a korreláció nem értelmezett; a kerekítési hiba ne adjon számot
+    constant = (var_x <= 1e-12 * sum_xx) | (var_y <= 1e-12 * sum_xx.T)
+    r[(n < min_periods) | constant] = np.nan
+    return np.clip(r, -1, 1)
+
+
+# A korrelációs mátrixok előállítása minden évre és az összes évre együtt, betöltéskor
+def compute_correlations(data):
+    variables = [v for v in indicator_translation if v in data]
+    years = sorted(data['Year'].dropna().unique().tolist()) if 'Year' in data else []
+    result = {'variables': variables, 'years': years, 'pearson': {}, 'spearman': {}}
+    if not variables or not years:
+        result['years'] = []
+        return result
+
+    values = data[variables].apply(pd.to_numeric, errors='coerce')
+    year_values = data['Year'].to_numpy()
+    groups = [(year, values[year_values == year]) for year in years] + [('all', values)]
+    for key, group in groups:
+        result['pearson'][key] = _pairwise_pearson(group.to_numpy(dtype=float))
+        # A Spearman-korrelációhoz minden pár a saját közös sorain rangsorol; ezt a pandas
+        # páronkénti megvalósítása O(sorok * változók) memóriával végzi
+        result['spearman'][key] = group.corr(method='spearman', min_periods=3).to_numpy()
+    return result
+
+
+# Az idősoros diagramokon választható származtatott mutatók
+derived_metrics = {
+    'growth': 'Éves változás (%)',
+    'rolling': '3 éves mozgóátlag',
+    'filled': 'Hiányzó évek pótolva',
+}
+
+
+# A származtatott mutató oszlopának neve ('raw' esetén az eredeti oszlop)
+def derived_column(column, metric):
+    return column if metric in (None, 'raw') else f'{column} [{metric}]'
+
+
+# Éves változás, mozgóátlag és a hiányzó évek lineáris pótlása országonként, minden mutatóra egyszerre.
+# Az adatok ország és év szerint rendezettek; az eredmény float32 oszlopokként kerül az adatok mellé.
+def compute_derived_metrics(data):
+    variables = [v for v in indicator_translation if v in data]
+    values = data[variables].apply(pd.to_numeric, errors='coerce')
+    countries = data['Country']
+    years = data['Year']
+
+    # Éves változás az előző évhez képest (csak egymást követő évek között)
+    previous = values.groupby(countries).shift(1)
+    consecutive = years.groupby(countries).diff() == 1
+    growth = ((values - previous) / previous.where(previous != 0).abs() * 100).where(consecutive, axis=0)
+
+    # 3 éves mozgóátlag az [év - 2, év] időszakra, nem az utolsó 3 sorra: a kihagyott évek
+    # nem húzzák be a régebbi adatokat (mint a növekedésnél), a hiányzó értékeket kihagyjuk
+    total = values.fillna(0)
+    count = values.notna().astype(float)
+    for lag in (1, 2):
+        in_window = years - years.groupby(countries).shift(lag) <= 2
+        lagged = values.groupby(countries).shift(lag).where(in_window, axis=0)
+        total += lagged.fillna(0)
+        count += lagged.notna()
+    rolling = (total / count).where(count > 0)
+
+    # Hiányzó értékek lineáris pótlása a két szomszédos ismert év között (extrapoláció nélkül)
+    known_years = pd.DataFrame({v: years.where(values[v].notna()) for v in variables})
+    previous_year = known_years.groupby(countries).ffill()
+    next_year = known_years.groupby(countries).bfill()
+    previous_value = values.groupby(countries).ffill()
+    next_value = values.groupby(countries).bfill()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = previous_year.rsub(years, axis=0) / (next_year - previous_year)
+    filled = values.fillna(previous_value + (next_value - previous_value) * weight)
+
+    # A növekedés és a mozgóátlag float32-ben is elég pontos; a pótolt sorozat float64 marad,
+    # mert az ismert értékeket (pl. népesség, GDP) a float32 kerekítené
+    derived = pd.concat({
+        'growth': growth.astype('float32'),
+        'rolling': rolling.astype('float32'),
+        'filled': filled.astype('float64'),
+    }, axis=1)
+    derived.columns = [derived_column(column, metric) for metric, column in derived.columns]
+    return derived
+
+
+# Egy betöltött adathalmaz: az adatok, az ország szerinti sorindex és a számított eredmények gyorsítótára
+class Dataset:
+    def __init__(self, name, data, version):
+        self.name = name
+        self.data = data
+        self.version = version  # A fájl módosítási ideje, ennek változásakor újratöltünk
+        # Ország -> sorpozíciók, hogy az országszűrés ne a teljes táblát vizsgálja
+        self.country_rows = data.groupby('Country').indices if 'Country' in data else {}
+        # A korrelációs mátrixok előre kiszámítása, így az év vagy a módszer váltása nem jár számítással;
+        # üres (sikertelenül betöltött) adathalmazra üres eredményt ad, így a kulcs mindig létezik
+        self.cache = {'correlation': compute_correlations(data)}
+
+    def country_data(self, countries):
+        positions = [self.country_rows[c] for c in countries if c in self.country_rows]
+        if not positions:
+            return self.data.iloc[0:0]
+        return self.data.iloc[np.sort(np.concatenate(positions))]
+
+    def memory_usage(self):
+        size = int(self.data.memory_usage(deep=True).sum())
+        # A gyorsítótárban tárolt numpy tömbök mérete is beleszámít a memóriakorlátba
+        for entry in self.cache.values():
+            for value in (entry.values() if isinstance(entry, dict) else [entry]):
+                for array in (value.values() if isinstance(value, dict) else [value]):
+                    size += getattr(array, 'nbytes', 0)
+        return size
+
+
+# Az adatok előkészítése: típuskonverzió, országkódok és a származtatott mutatók
+def prepare_data(data):
+    # Átalakítjuk a 'Life expectancy' oszlopot numerikus értékekre, ha szükséges
+    data['Life expectancy '] = pd.to_numeric(data['Life expectancy '], errors='coerce')
+
+    # Országkód hozzáadása (országonként egyszer keresünk, nem soronként)
+    codes = {country: get_country_code(country) for country in data['Country'].unique()}
+    data['Country Code'] = data['Country'].map(codes)
+
+    # Ellenőrizzük, hogy minden országnak sikerült-e az országkódot hozzárendelni
+    if data['Country Code'].isnull().any():
+        missing_countries = data[data['Country Code'].isnull()]['Country'].unique()
+        print(f"Ezekhez az országokhoz nem találtunk kódot: {missing_countries}")
+
+    # Származtatott idősoros mutatók előre kiszámítása ország és év szerint rendezett adatokon
+    data = data.sort_values(['Country', 'Year']).reset_index(drop=True)
+    return pd.concat([data, compute_derived_metrics(data)], axis=1)
+
+
+# Üres adattábla ugyanazokkal az oszlopokkal (országkód, származtatott mutatók), mint egy betöltött adathalmaz,
+# hogy a sikertelen betöltés helyén is ugyanazok az oszlopnevek legyenek elérhetők
+def empty_data():
+    return prepare_data(pd.DataFrame(columns=required_columns))
+
+
+# Fájl beolvasása és hibakezelés, majd az adatok előkészítése.
+# Sikertelen betöltéskor is a fájl módosítási idejét tároljuk verzióként, így a hibás fájlt
+# nem olvassuk be újra minden kérésnél, csak ha közben megváltozott.
+def load_dataset(name):
+    file_path = os.path.join(data_directory, name)
+    try:
+        version = os.path.getmtime(file_path)
+    except OSError:
+        print(f"A fájl nem található ezen az útvonalon: {file_path}")
+        return Dataset(name, empty_data(), None)
+
+    try:
+        data = pd.read_csv(file_path)
+        missing_columns = [c for c in required_columns if c not in data]
+        if missing_columns:
+            raise ValueError(f"hiányzó oszlopok: {missing_columns}")
+        data = prepare_data(data)
+        print(f"Fájl sikeresen beolvasva: {name}")
+    except Exception as e:
+        print(f"Hiba történt a fájl beolvasása közben ({name}): {e}")
+        return Dataset(name, empty_data(), version)
+
+    return Dataset(name, data, version)
+
+
+# Az adathalmazok nyilvántartása: igény szerinti betöltés, memóriakorlátos LRU kiürítéssel
+class DatasetRegistry:
+    def __init__(self, directory, default, memory_limit, listing_ttl):
+        self.directory = directory
+        self.default = default
+        self.memory_limit = memory_limit
+        self.listing_ttl = listing_ttl
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # Adathalmazonkénti betöltési zár: egy adathalmazt egyszerre csak egy szál tölt be
+        self._loading_locks = {}
+        # A könyvtárlista (fájlnév -> módosítási idő) és a fejlécellenőrzések gyorsítótára
+        self._listing = {}
+        self._listing_time = None
+        self._header_checks = {}
+
+    # A könyvtár felhasználható CSV fájljai, legfeljebb listing_ttl másodpercenként újraolvasva,
+    # hogy a callbackok ne járják be minden kérésnél a könyvtárat
+    def _current_listing(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._listing_time is not None and now - self._listing_time < self.listing_ttl:
+                return self._listing
+
+        try:
+            names = [f for f in os.listdir(self.directory) if f.lower().endswith('.csv')]
+        except OSError:
+            names = []
+        listing = {}
+        header_checks = {}
+        for name in names:
+            try:
+                version = os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            key = (name, version)
+            header_checks[key] = self._header_checks.get(key)
+            if header_checks[key] is None:
+                header_checks[key] = self._has_required_columns(name)
+            if header_checks[key]:
+                listing[name] = version
+
+        with self._lock:
+            self._listing, self._listing_time, self._header_checks = listing, now, header_checks
+        return listing
+
+    # Csak a fejlécet olvassuk be: megvannak-e a szükséges oszlopok
+    def _has_required_columns(self, name):
+        try:
+            columns = pd.read_csv(os.path.join(self.directory, name), nrows=0).columns
+        except Exception:
+            columns = []
+        if all(c in columns for c in required_columns):
+            return True
+        print(f"A fájl kimarad a választható adathalmazok közül (hiányzó oszlopok vagy olvasási hiba): {name}")
+        return False
+
+    # A könyvtárban elérhető, megfelelő oszlopokat tartalmazó CSV fájlok
+    def available(self):
+        return sorted(self._current_listing()) or [self.default]
+
+    # Csak ismert fájlnevet fogadunk el, különben az alapértelmezettet adjuk; ha az alapértelmezett
+    # fájl hiányzik vagy nem megfelelő, az első elérhető adathalmazt
+    def _resolve(self, name, listing):
+        if name in listing:
+            return name
+        if self.default in listing or not listing:
+            return self.default
+        return min(listing)
+
+    def resolve(self, name):
+        return self._resolve(name, self._current_listing())
+
+    # A betöltött adathalmaz, ha a verziója még aktuális (a zárolás alatt hívandó)
+    def _cached(self, name, version):
+        dataset = self._loaded.get(name)
+        if dataset is not None and dataset.version == version:
+            self._loaded.move_to_end(name)
+            return dataset
+        return None
+
+    def get(self, name=None):
+        listing = self._current_listing()
+        name = self._resolve(name, listing)
+        # A verzió a könyvtárlistából jön, így a frissítést a lista következő beolvasásakor észleljük
+        version = listing.get(name)
+        with self._lock:
+            dataset = self._cached(name, version)
+            if dataset is not None:
+                return dataset
+            loading_lock = self._loading_locks.setdefault(name, threading.Lock())
+
+        # A betöltés a közös zároláson kívül történik, hogy a többi adathalmaz kiszolgálását ne blokkolja.
+        # Ugyanarra az adathalmazra érkező párhuzamos kérések közül csak egy tölt be, a többi megvárja
+        # az eredményét, így nem kerül egyszerre több példány a memóriába.
+        with loading_lock:
+            with self._lock:
+                dataset = self._cached(name, version)
+                if dataset is not None:
+                    return dataset
+
+            dataset = load_dataset(name)
+            # A listában szereplő verzióval tároljuk (a listából hiányzó, pl. hibás alapértelmezett fájl esetén None),
+            # így a következő hívások a gyorsítótárból szolgálhatók ki
+            dataset.version = version
+            with self._lock:
+                self._loaded[name] = dataset
+                self._loaded.move_to_end(name)
+                self._evict()
+        return dataset
+
+    # A legrégebben használt adathalmazok kiürítése, amíg a korlát alá nem kerülünk
+    def _evict(self):
+        total = sum(d.memory_usage() for d in self._loaded.values())
+        while total > self.memory_limit and len(self._loaded) > 1:
+            name, dataset = self._loaded.popitem(last=False)
+            total -= dataset.memory_usage()
+            print(f"Adathalmaz kiürítve a memóriából: {name}")
+
+
+datasets = DatasetRegistry(data_directory, file_name, dataset_memory_limit, dataset_listing_ttl)
+if datasets.resolve(None) != file_name:
+    print(f"Az alapértelmezett adathalmaz nem használható ({file_name}), helyette: {datasets.resolve(None)}")
+# Az alapértelmezett adathalmaz betöltése induláskor
+datasets.get()
     
     
 
@@ -79,6 +407,16 @@ app.layout = html.Div(
     children=[
         html.H1("Interaktív Dash Alkalmazás", style={'textAlign': 'center', 'color': '#3498db', 'padding-bottom': '20px'}),
 
+        # Az adathalmaz kiválasztása URL paraméterrel (?dataset=...) vagy legördülő menüvel
+        dcc.Location(id='url', refresh=False),
+        dcc.Dropdown(
+            id='dataset-dropdown',
+            options=[{'label': name, 'value': name} for name in datasets.available()],
+            value=datasets.resolve(None),
+            clearable=False,
+            style={'width': '30%', 'margin': 'auto', 'marginBottom': '20px', 'color': '#3498db'},
+            className='dataset-dropdown'
+        ),
         
         # Tab struktúra létrehozása sötét háttérrel és világos feliratokkal
         dcc.Tabs(id="tabs-example", value='tab-1', children=[
@@ -88,7 +426,8 @@ app.layout = html.Div(
             dcc.Tab(label='Várható élettartam elemzés', value='tab-4', style={'backgroundColor': '#343a40', 'color': '#ffffff', 'padding': '10px'}),
             dcc.Tab(label='Év és változó gyakorisági elemzés', value='tab-5', style={'backgroundColor': '#343a40', 'color': '#ffffff', 'padding': '10px'}),
             dcc.Tab(label='Tematikus térkép', value='tab-6', style={'backgroundColor': '#343a40', 'color': '#ffffff', 'padding': '10px'}),
-            dcc.Tab(label='Regressziós modell', value='tab-7', style={'backgroundColor': '#343a40', 'color': '#ffffff', 'padding': '10px'})
+            dcc.Tab(label='Regressziós modell', value='tab-7', style={'backgroundColor': '#343a40', 'color': '#ffffff', 'padding': '10px'}),
+            dcc.Tab(label='Korrelációs mátrix', value='tab-8', style={'backgroundColor': '#343a40', 'color': '#ffffff', 'padding': '10px'})
         ]),
         
       
@@ -106,12 +445,31 @@ app.layout = html.Div(
 )
 
 
+# Callback az adathalmaz kiválasztásához az URL paraméter alapján
+@app.callback(
+    [Output('dataset-dropdown', 'options'),
+     Output('dataset-dropdown', 'value')],
+    Input('url', 'search')
+)
+def select_dataset_from_url(search):
+    params = parse_qs((search or '').lstrip('?'))
+    selected = datasets.resolve(params.get('dataset', [None])[0])
+    return [{'label': name, 'value': name} for name in datasets.available()], selected
+
+
 # Callback a tabok tartalmának megjelenítéséhez
 @app.callback(
     Output('tabs-content-example', 'children'),
-    Input('tabs-example', 'value')
+    [Input('tabs-example', 'value'),
+     Input('dataset-dropdown', 'value')]
 )
-def render_content(tab):
+def render_content(tab, dataset_name):
+    data = datasets.get(dataset_name).data
+
+    # Üres (pl. sikertelenül betöltött) adathalmaznál a csúszkák és listák nem állíthatók be
+    if tab != 'tab-1' and data.empty:
+        return html.Div("Nincs megjeleníthető adat a kiválasztott adathalmazban.", style={'color': 'white', 'textAlign': 'center'})
+
     if tab == 'tab-1':
         return html.Div([
             html.Div([
@@ -154,6 +512,14 @@ def render_content(tab):
                 style={'width': '25%', 'margin': 'auto','color': '#3498db'},
                 className='country-dropdown'
             ),
+            dcc.RadioItems(
+                id='gdp-metric-radio',
+                options=[{'label': ' Eredeti értékek', 'value': 'raw'}] + [{'label': f' {label}', 'value': metric} for metric, label in derived_metrics.items()],
+                value='raw',
+                inline=True,
+                inputStyle={'marginLeft': '20px'},
+                style={'color': '#ffffff', 'textAlign': 'center', 'padding': '10px'}
+            ),
             dcc.Graph(id='gdp-graph'),
             
         ], style={'backgroundColor': '#343a40', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 0 10px rgba(255,255,255,0.1)'})
@@ -201,6 +567,14 @@ def render_content(tab):
             style={'width': '30%', 'margin': 'auto', 'color': '#3498db'},
             className='life-expectancy-dropdown'
         ),
+        dcc.RadioItems(
+            id='life-expectancy-metric-radio',
+            options=[{'label': ' Eredeti értékek', 'value': 'raw'}] + [{'label': f' {label}', 'value': metric} for metric, label in derived_metrics.items()],
+            value='raw',
+            inline=True,
+            inputStyle={'marginLeft': '20px'},
+            style={'color': '#ffffff', 'textAlign': 'center', 'padding': '10px'}
+        ),
         # Placeholder for the graph, initially empty
         html.Div(id='life-expectancy-graph-container')
     ], style={'backgroundColor': '#343a40', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 0 10px rgba(255,255,255,0.1)'})
@@ -227,25 +601,7 @@ def render_content(tab):
             html.Div([
                 dcc.Dropdown(
                     id='variable-dropdown',
-                    options=[{'label': 'GDP', 'value': 'GDP'},
-                             {'label': 'Várható élettartam', 'value': 'Life expectancy '},
-                             {'label': 'Népesség', 'value': 'Population'},                 
-                             {'label': 'Felnőttkori halálozás', 'value': 'Adult Mortality'},
-                             {'label': 'Csecsemőhalálozás', 'value': 'infant deaths'},
-                             {'label': 'Alkohol fogysztás', 'value': 'Alcohol'},
-                             {'label': 'Kiadások aránya', 'value': 'percentage expenditure'},
-                             {'label': 'Hepatitisz B oltottság', 'value': 'Hepatitis B'},
-                             {'label': 'Kanyaró', 'value': 'Measles '},
-                             {'label': 'Átlagos testtömegindex', 'value': 'BMI '},
-                             {'label': '5 éves kor alatti halálozás', 'value': 'under-five deaths '},
-                             {'label': 'Polio oltottság', 'value': 'Polio'},
-                             {'label': 'Állami eü kiadások', 'value': 'Total expenditure'},
-                             {'label': 'Diftéria oltottság', 'value': 'Diphtheria '},
-                             {'label': 'HIV/AIDS halálozások', 'value': 'HIV/AIDS'},
-                             {'label': 'Soványság 1-19 éves', 'value': ' thinness  1-19 years'},
-                             {'label': 'Soványság 5-9 éves', 'value': ' thinness 5-9 years'},
-                             {'label': 'Emberi fejlettség', 'value': 'Income composition of resources'},
-                             {'label': 'Iskolai évek száma', 'value': 'Schooling'},],
+                    options=[{'label': label, 'value': column} for column, label in indicator_translation.items()],
                     placeholder="Válasszon egy változót",
                     style={'width': '50%', 'margin': 'auto','color': '#3498db'},
                     className='variable-dropdown'
@@ -268,25 +624,7 @@ def render_content(tab):
         html.H3("Tematikus térkép", style={'textAlign': 'center', 'color': '#3498db'}),
         dcc.Dropdown(
             id='map-variable-dropdown',
-            options=[{'label': 'GDP', 'value': 'GDP'},
-                     {'label': 'Várható élettartam', 'value': 'Life expectancy '},
-                     {'label': 'Népesség', 'value': 'Population'},                 
-                     {'label': 'Felnőttkori halálozás', 'value': 'Adult Mortality'},
-                     {'label': 'Csecsemőhalálozás', 'value': 'infant deaths'},
-                     {'label': 'Alkohol fogysztás', 'value': 'Alcohol'},
-                     {'label': 'Kiadások aránya', 'value': 'percentage expenditure'},
-                     {'label': 'Hepatitisz B oltottság', 'value': 'Hepatitis B'},
-                     {'label': 'Kanyaró', 'value': 'Measles '},
-                     {'label': 'Átlagos testtömegindex', 'value': 'BMI '},
-                     {'label': '5 éves kor alatti halálozás', 'value': 'under-five deaths '},
-                     {'label': 'Polio oltottság', 'value': 'Polio'},
-                     {'label': 'Állami eü kiadások', 'value': 'Total expenditure'},
-                     {'label': 'Diftéria oltottság', 'value': 'Diphtheria '},
-                     {'label': 'HIV/AIDS halálozások', 'value': 'HIV/AIDS'},
-                     {'label': 'Soványság 1-19 éves', 'value': ' thinness  1-19 years'},
-                     {'label': 'Soványság 5-9 éves', 'value': ' thinness 5-9 years'},
-                     {'label': 'Emberi fejlettség', 'value': 'Income composition of resources'},
-                     {'label': 'Iskolai évek száma', 'value': 'Schooling'},],
+            options=[{'label': label, 'value': column} for column, label in indicator_translation.items()],
             placeholder="Válasszon egy változót",
             style={'width': '40%', 'margin': 'auto', 'color': '#3498db'},
     className='dropdown'
@@ -357,14 +695,43 @@ def render_content(tab):
            'borderRadius': '10px', 
            'boxShadow': '0 0 10px rgba(255,255,255,0.1)'})
 
+    elif tab == 'tab-8':
+        years = datasets.get(dataset_name).cache['correlation']['years']
+
+        return html.Div([
+        html.H3("Mutatók közötti korreláció", style={'textAlign': 'center', 'color': '#3498db'}),
+        html.Div([
+            dcc.Dropdown(
+                id='correlation-year-dropdown',
+                options=[{'label': 'Összes év', 'value': 'all'}] + [{'label': str(year), 'value': year} for year in years],
+                value='all',
+                clearable=False,
+                style={'width': '200px', 'color': '#3498db'}
+            ),
+            dcc.RadioItems(
+                id='correlation-method-radio',
+                options=[{'label': ' Pearson', 'value': 'pearson'},
+                         {'label': ' Spearman', 'value': 'spearman'}],
+                value='pearson',
+                inline=True,
+                inputStyle={'marginLeft': '20px'},
+                style={'color': '#ffffff'}
+            ),
+        ], style={'display': 'flex', 'justify-content': 'center', 'alignItems': 'center'}),
+        html.Br(),
+        dcc.Graph(id='correlation-graph'),
+    ], style={'backgroundColor': '#343a40', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 0 10px rgba(255,255,255,0.1)'})
+
 
 
 # Callback a GDP diagramhoz (Tab 2)
 @app.callback(
     Output('gdp-graph', 'figure'),
-    [Input('country-dropdown', 'value')]
+    [Input('country-dropdown', 'value'),
+     Input('gdp-metric-radio', 'value')],
+    State('dataset-dropdown', 'value')
 )
-def update_gdp_graph(selected_country):
+def update_gdp_graph(selected_country, metric, dataset_name):
     # Ha nincs kiválasztva ország, ne jelenítsen meg diagramot, üres layout
     if not selected_country:
         return go.Figure().update_layout(
@@ -375,8 +742,8 @@ def update_gdp_graph(selected_country):
             yaxis={'visible': False}
         )
 
-    # Szűrjük az adatokat a kiválasztott ország alapján
-    filtered_data = data[data['Country'] == selected_country]
+    # Szűrjük az adatokat a kiválasztott ország alapján (az ország szerinti index segítségével)
+    filtered_data = datasets.get(dataset_name).country_data([selected_country])
 
     # Ellenőrizzük, hogy van-e adat a kiválasztott országra
     if filtered_data.empty:
@@ -388,19 +755,28 @@ def update_gdp_graph(selected_country):
             yaxis={'visible': False}
         )
 
+    # A megjelenítendő oszlop: az eredeti GDP vagy a betöltéskor kiszámított származtatott mutató
+    if metric not in derived_metrics:
+        metric = 'raw'
+    y_column = derived_column('GDP', metric)
+    y_title = 'GDP (USD)' if metric == 'raw' else f'GDP - {derived_metrics[metric]}'
+    title = f'{selected_country} GDP alakulása oszlopdiagramon'
+    if metric != 'raw':
+        title += f' ({derived_metrics[metric]})'
+
     # GDP oszlopdiagram létrehozása
     fig = px.bar(
         filtered_data,
         x='Year',
-        y='GDP',
-        title=f'{selected_country} GDP alakulása oszlopdiagramon',
-        labels={'GDP': 'GDP (USD)', 'Year': 'Év'}
+        y=y_column,
+        title=title,
+        labels={y_column: y_title, 'Year': 'Év'}
     )
 
     # Diagram színeinek frissítése
     fig.update_layout(
         xaxis_title='Év',
-        yaxis_title='GDP (USD)',
+        yaxis_title=y_title,
         title_x=0.5,
         plot_bgcolor='#343a40',  # Diagram háttérszíne
         paper_bgcolor='#343a40',  # Papír háttérszíne
@@ -439,9 +815,11 @@ def translate_status(status):
 @app.callback(
     Output('filtered-countries', 'children'),
     [Input('population-slider', 'value'),
-     Input('gdp-slider', 'value')]
+     Input('gdp-slider', 'value')],
+    State('dataset-dropdown', 'value')
 )
-def update_filtered_countries(pop_range, gdp_range):
+def update_filtered_countries(pop_range, gdp_range, dataset_name):
+    data = datasets.get(dataset_name).data
     # Szűrjük az adatokat a népesség és GDP tartomány alapján
     filtered_data = data[
         (data['Population'] >= pop_range[0] * 1e6) & (data['Population'] <= pop_range[1] * 1e6) &
@@ -463,29 +841,40 @@ def update_filtered_countries(pop_range, gdp_range):
 # Callback a várható élettartam grafikonhoz (Tab 4)
 @app.callback(
     Output('life-expectancy-graph-container', 'children'),
-    [Input('multi-country-dropdown', 'value')]
+    [Input('multi-country-dropdown', 'value'),
+     Input('life-expectancy-metric-radio', 'value')],
+    State('dataset-dropdown', 'value')
 )
-def update_life_expectancy_graph(selected_countries):
+def update_life_expectancy_graph(selected_countries, metric, dataset_name):
     # Ha nincs kiválasztva ország, vagy üres a lista, ne jelenjen meg semmi
     if not selected_countries or len(selected_countries) == 0:
         return html.Div()  # Üres div, hogy ne jelenjen meg semmi
 
-    # Szűrjük az adatokat a kiválasztott országok alapján
-    filtered_data = data[data['Country'].isin(selected_countries)]
+    # Szűrjük az adatokat a kiválasztott országok alapján (az ország szerinti index segítségével)
+    filtered_data = datasets.get(dataset_name).country_data(selected_countries)
 
     # Ha nincs adat a kiválasztott országokra, ne jelenjen meg a diagram
     if filtered_data.empty:
         return html.Div("Nincs elérhető adat a kiválasztott ország(ok)ra.", style={'color': 'white', 'textAlign': 'center'})
 
+    # A megjelenítendő oszlop: az eredeti érték vagy a betöltéskor kiszámított származtatott mutató
+    if metric not in derived_metrics:
+        metric = 'raw'
+    y_column = derived_column('Life expectancy ', metric)
+    y_title = 'Várható élettartam (év)' if metric == 'raw' else f'Várható élettartam - {derived_metrics[metric]}'
+    title = 'Várható élettartam alakulása több országban'
+    if metric != 'raw':
+        title += f' ({derived_metrics[metric]})'
+
     # Vonaldiagram létrehozása a kiválasztott országok adataihoz
     fig = px.line(
         filtered_data,
         x='Year',
-        y='Life expectancy ',
+        y=y_column,
         color='Country',
-        title='Várható élettartam alakulása több országban',
+        title=title,
         labels={
-            'Life expectancy ': 'Várható élettartam (év)',
+            y_column: y_title,
             'Year': 'Év',
             'Country': 'Ország'
         }
@@ -493,13 +882,13 @@ def update_life_expectancy_graph(selected_countries):
 
     fig.update_traces(
         mode="lines+markers",
-        hovertemplate='<br>Várható élettartam=%{y} év',
+        hovertemplate='<br>Várható élettartam=%{y} év' if metric == 'raw' else f'<br>{y_title}=%{{y:.2f}}',
     )
 
     # A layout testreszabása, hogy a stílus illeszkedjen a sötét témához
     fig.update_layout(
         xaxis_title='Év',
-        yaxis_title='Várható élettartam (év)',
+        yaxis_title=y_title,
         title_x=0.5,
         showlegend=True,
         plot_bgcolor='#343a40',
@@ -538,9 +927,10 @@ def update_life_expectancy_graph(selected_countries):
     Output('histogram-graph', 'figure'),
     [Input('year-slider', 'value'),
      Input('variable-dropdown', 'value'),
-     Input('bins-input', 'value')]
+     Input('bins-input', 'value')],
+    State('dataset-dropdown', 'value')
 )
-def update_histogram(selected_year, selected_variable, bins):
+def update_histogram(selected_year, selected_variable, bins, dataset_name):
     # Ellenőrizzük, hogy minden bemenet megvan-e
     if selected_year is None or not selected_variable or bins is None:
         # Üres diagram visszaadása, ha nincs megadva bemenet
@@ -553,6 +943,7 @@ def update_histogram(selected_year, selected_variable, bins):
         )
 
     # Szűrjük az adatokat a kiválasztott év alapján
+    data = datasets.get(dataset_name).data
     filtered_data = data[data['Year'] == selected_year]
 
     # Ha nincs adat, üres diagramot adunk vissza
@@ -564,32 +955,9 @@ def update_histogram(selected_year, selected_variable, bins):
             xaxis={'visible': False},
             yaxis={'visible': False}
         )
-    
-    # Fordítás létrehozása a kiválasztott változóhoz
-    variable_translation = {
-        'Life expectancy ': 'Várható élettartam',
-        'Population': 'Népesség',
-        'Adult Mortality': 'Felnőttkori halálozás',
-        'infant deaths': 'Csecsemőhalálozás',
-        'GDP': 'GDP',
-        'Alcohol': 'Alkohol fogysztás',
-        'percentage expenditure': 'Kiadások aránya',
-        'Hepatitis B': 'Hepatitisz B oltottság',
-        'Measles ': 'Kanyaró',
-        'BMI ': 'Átlagos testtömegindex',
-        'under-five deaths ': '5 éves kor alatti halálozás',
-        'Polio': 'Polio oltottság',
-        'Total expenditure': 'Állami eü kiadások',
-        'Diphtheria ': 'Diftéria oltottság',
-        'HIV/AIDS': 'HIV/AIDS halálozások',
-        ' thinness  1-19 years': 'Soványság 1-19 éves',
-        ' thinness 5-9 years': 'Soványság 5-9 éves',
-        'Income composition of resources': 'Emberi fejlettség',
-        'Schooling': 'Iskolai évek száma',
-        
-    }
-    
-    translated_variable = variable_translation.get(selected_variable, selected_variable)
+
+    # A kiválasztott változó magyar neve
+    translated_variable = indicator_translation.get(selected_variable, selected_variable)
 
     # Gyakorisági diagram létrehozása a kiválasztott változóra
     fig = px.histogram(
@@ -633,9 +1001,10 @@ def update_histogram(selected_year, selected_variable, bins):
 # Callback a dinamikus tematikus térkép frissítéséhez (Tab 6)
 @app.callback(
     Output('choropleth-map', 'figure'),
-    [Input('map-variable-dropdown', 'value')]
+    [Input('map-variable-dropdown', 'value')],
+    State('dataset-dropdown', 'value')
 )
-def update_dynamic_map(selected_variable):
+def update_dynamic_map(selected_variable, dataset_name):
     # Ha nincs kiválasztva változó, akkor üres ábrát adunk vissza
     if not selected_variable:
         return go.Figure().update_layout(
@@ -646,18 +1015,23 @@ def update_dynamic_map(selected_variable):
             yaxis={'visible': False}
         )
     
-   # Fordítás létrehozása a kiválasztott változóhoz
-    variable_translation = {
-        'Life expectancy ': 'Várható élettartam',
-        'Population': 'Népesség',
-        'GDP': 'GDP'
-    }
-
-    translated_variable = variable_translation.get(selected_variable, selected_variable)
+    # A kiválasztott változó magyar neve
+    translated_variable = indicator_translation.get(selected_variable, selected_variable)
     
     # Rendezzük az adatokat az 'Year' szerint növekvő sorrendben
+    data = datasets.get(dataset_name).data
     filtered_data = data.sort_values(by='Year')
 
+    # Ha nincs adat, üres ábrát adunk vissza
+    if filtered_data.empty:
+        return go.Figure().update_layout(
+            plot_bgcolor='#343a40',
+            paper_bgcolor='#343a40',
+            font=dict(color='#ffffff'),
+            xaxis={'visible': False},
+            yaxis={'visible': False}
+        )
+
     # Dinamikus tematikus térkép létrehozása az év alapján animálva (legkisebb évszámtól a legnagyobbig)
     fig = px.choropleth(
         filtered_data,  # Az egész adatot használjuk, hogy minden év elérhető legyen
@@ -694,9 +1068,10 @@ def update_dynamic_map(selected_variable):
 @app.callback(
     Output('regression-graph', 'figure'),
     [Input('year-dropdown', 'value'),
-     Input('degree-slider', 'value')]
+     Input('degree-slider', 'value')],
+    State('dataset-dropdown', 'value')
 )
-def update_regression_graph(selected_year, degree):
+def update_regression_graph(selected_year, degree, dataset_name):
     # Ha nincs kiválasztott év, üres diagram visszaadása
     if not selected_year:
         return go.Figure().update_layout(
@@ -708,9 +1083,20 @@ def update_regression_graph(selected_year, degree):
         )
 
     # Ha van kiválasztott év, folytatjuk az adatfeldolgozást
+    data = datasets.get(dataset_name).data
     filtered_data = data[data['Year'] == selected_year]
     filtered_data = filtered_data.dropna(subset=['GDP', 'Life expectancy '])
 
+    # Ha a kiválasztott évre nincs adat, a modell nem illeszthető, üres diagramot adunk vissza
+    if filtered_data.empty:
+        return go.Figure().update_layout(
+            plot_bgcolor='#343a40',
+            paper_bgcolor='#343a40',
+            font=dict(color='#ffffff'),
+            xaxis={'visible': False},
+            yaxis={'visible': False}
+        )
+
     X = filtered_data['GDP'].values.reshape(-1, 1)
     y = filtered_data['Life expectancy '].values
 
@@ -756,6 +1142,177 @@ def update_regression_graph(selected_year, degree):
     return fig
 
 
+# Callback a korrelációs mátrixhoz (Tab 8)
+@app.callback(
+    Output('correlation-graph', 'figure'),
+    [Input('correlation-year-dropdown', 'value'),
+     Input('correlation-method-radio', 'value')],
+    State('dataset-dropdown', 'value')
+)
+def update_correlation_graph(selected_year, method, dataset_name):
+    # A mátrixok betöltéskor készültek el, itt csak kiválasztjuk a megfelelőt
+    correlation = datasets.get(dataset_name).cache['correlation']
+    matrix = correlation[method].get(selected_year)
+
+    # Ha nincs adat a kiválasztott évre, üres diagramot adunk vissza
+    if matrix is None:
+        return go.Figure().update_layout(
+            plot_bgcolor='#343a40',
+            paper_bgcolor='#343a40',
+            font=dict(color='#ffffff'),
+            xaxis={'visible': False},
+            yaxis={'visible': False}
+        )
+
+    labels = [indicator_translation[v] for v in correlation['variables']]
+    year_label = 'az összes évben' if selected_year == 'all' else f'{selected_year}-ben'
+
+    fig = go.Figure(go.Heatmap(
+        z=np.round(matrix, 2),
+        x=labels,
+        y=labels,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu',
+        reversescale=True,
+        text=np.round(matrix, 2),
+        texttemplate='%{text}',
+        hovertemplate='%{y} - %{x}<br>Korreláció: %{z}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f'{method.capitalize()} korrelációs mátrix {year_label}',
+        plot_bgcolor='#343a40',
+        paper_bgcolor='#343a40',
+        font=dict(color='#ffffff'),
+        title_x=0.5,
+        height=800,
+        yaxis=dict(autorange='reversed'),
+        hoverlabel=dict(
+            font_size=16
+        )
+    )
+
+    return fig
+
+
+# Opcionális kérésenkénti profilozás a callbackokhoz.
+# PROFILOZAS=mind: minden callback kérés profilozása; PROFILOZAS=fejlec: csak az 'X-Profile: 1' fejlécet küldő kéréseké.
+# Callbackonként egy cProfile (.prof, pl. snakeviz-zel megnyitható) és egy flamegraph-hoz használható
+# összevont veremminta (.folded) fájl készül. Legfeljebb PROFILOZAS_MAX_PROFIL profilt (fájlpárt) tartunk meg,
+# a legrégebbiek törlésével.
+profiling_mode = os.environ.get('PROFILOZAS', '').lower()
+profiling_directory = os.environ.get('PROFILOZAS_KONYVTAR', os.path.join(current_directory, 'profiles'))
+profiling_max_profiles = int(os.environ.get('PROFILOZAS_MAX_PROFIL', 100))
+profiling_interval = float(os.environ.get('PROFILOZAS_MINTAVETEL_MS', 2)) / 1000
+# Egyszerre csak egy kérést profilozunk (a cProfile nem futhat párhuzamosan több szálon)
+profiling_lock = threading.Lock()
+
+
+# A profilozott szál vermének rendszeres mintavételezése, összevont (folded) formátumban
+class StackSampler(threading.Thread):
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':'))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# A profilok számának korlátozása: a legrégebbiek törlése.
+# Egy profil a közös alapnevű .prof és .folded fájlpár, ezeket együtt töröljük, hogy ne maradjon fél pár.
+# Több worker is törölhet egyszerre, ezért a közben eltűnt fájlokat egyszerűen kihagyjuk.
+def prune_profiles():
+    profiles = {}
+    for f in os.listdir(profiling_directory):
+        path = os.path.join(profiling_directory, f)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        base_name = os.path.splitext(f)[0]
+        newest, paths = profiles.get(base_name, (mtime, []))
+        profiles[base_name] = (max(newest, mtime), paths + [path])
+    # Az alapnév időbélyeggel kezdődik, így azonos módosítási időnél is a régebbi profil kerül előre
+    oldest = sorted(profiles.items(), key=lambda item: (item[1][0], item[0]))
+    for _, (_, paths) in oldest[:max(0, len(oldest) - profiling_max_profiles)]:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+@server.before_request
+def start_profiling():
+    if request.path != '/_dash-update-component' or profiling_mode not in ('mind', 'fejlec'):
+        return
+    if profiling_mode == 'fejlec' and request.headers.get('X-Profile') != '1':
+        return
+    # Ha éppen egy másik kérést profilozunk, ezt a kérést profilozás nélkül szolgáljuk ki
+    if not profiling_lock.acquire(blocking=False):
+        return
+    # Ha az indítás nem sikerül (pl. már fut egy profilozó ezen a szálon), a zárat itt engedjük el:
+    # a teardown profilozó nélkül nem tenné meg, és a folyamatban többé nem profiloznánk
+    sampler = StackSampler(threading.get_ident(), profiling_interval)
+    try:
+        sampler.start()
+        profiler = cProfile.Profile()
+        profile_start = time.perf_counter()
+        profiler.enable()
+    except Exception as e:
+        if sampler.is_alive():
+            sampler.stop()
+        profiling_lock.release()
+        print(f"Hiba történt a profilozás indítása közben: {e}")
+        return
+    g.sampler, g.profiler, g.profile_start = sampler, profiler, profile_start
+
+
+# A teardown a kivételt dobó kérések után is lefut, így a profilozó mindig leáll
+@server.teardown_request
+def stop_profiling(exception=None):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    try:
+        profiler.disable()
+        g.sampler.stop()
+        elapsed_ms = (time.perf_counter() - g.profile_start) * 1000
+
+        # A fájlnév a callback kimenetéből (pl. gdp-graph.figure) és az időtartamból áll
+        output = (request.get_json(silent=True) or {}).get('output', 'ismeretlen')
+        callback_name = re.sub(r'[^A-Za-z0-9_.-]', '_', output)[:100]
+        base_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}_{callback_name}_{elapsed_ms:.0f}ms"
+
+        os.makedirs(profiling_directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(profiling_directory, base_name + '.prof'))
+        with open(os.path.join(profiling_directory, base_name + '.folded'), 'w', encoding='utf-8') as f:
+            for stack, count in g.sampler.samples.items():
+                f.write(f'{stack} {count}\n')
+        prune_profiles()
+        print(f"Profil mentve: {base_name}")
+    except Exception as e:
+        print(f"Hiba történt a profil mentése közben: {e}")
+    finally:
+        profiling_lock.release()
+
+
 # Alkalmazás futtatása
 if __name__ == '__main__':
     app.run_server(debug=True)
@@ -0,0 +1,362 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import importlib.util
+import threading
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+import psutil
+import requests
+
+
+# Terheléses teszt a futó Dash szerver ellen: a böngésző által küldött
+# /_dash-update-component kéréseket generáljuk párhuzamosan, több workeres
+# WSGI szerveren futó alkalmazás ellen, növekvő párhuzamossággal.
+
+current_directory = os.path.dirname(os.path.abspath(__file__))
+# Az adathalmazokat ugyanonnan olvassuk, ahonnan az alkalmazás (KG6A2S.data_directory)
+data_directory = os.environ.get('ADATHALMAZ_KONYVTAR', current_directory)
+file_name = os.environ.get('ADATHALMAZ_ALAPERTELMEZETT', '3_varhato_elettartam.csv')  # Az alapértelmezett adathalmaz
+
+# A tab-5 / tab-6 legördülő menüiben szereplő változók
+VALTOZOK = [
+    'GDP', 'Life expectancy ', 'Population', 'Adult Mortality', 'infant deaths',
+    'Alcohol', 'percentage expenditure', 'Hepatitis B', 'Measles ', ' BMI ',
+    'under-five deaths ', 'Polio', 'Total expenditure', 'Diphtheria ', ' HIV/AIDS',
+    ' thinness  1-19 years', ' thinness 5-9 years',
+    'Income composition of resources', 'Schooling',
+]
+
+# A tab-2 / tab-4 diagramjain választható (eredeti vagy származtatott) mutatók
+MUTATOK = ['raw', 'growth', 'rolling', 'filled']
+
+TABOK = ['tab-1', 'tab-2', 'tab-3', 'tab-4', 'tab-5', 'tab-6', 'tab-7', 'tab-8']
+
+
+# Egy /_dash-update-component kérés törzsének összeállítása
+# (a tabok callbackjai a kiválasztott adathalmazt állapotként kapják meg)
+def dash_keres(ctx, output_id, output_prop, inputs, changed, dataset_state=True):
+    state = [{'id': 'dataset-dropdown', 'property': 'value', 'value': ctx['dataset']}] if dataset_state else []
+    return {
+        'output': f'{output_id}.{output_prop}',
+        'outputs': {'id': output_id, 'property': output_prop},
+        'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+        'changedPropIds': [changed],
+        'state': state,
+    }
+
+
+# Az adatokból a valószerű bemeneti értékek (országok, évek, tartományok) kinyerése
+def kontextus_betoltese(adathalmaz):
+    data = pd.read_csv(os.path.join(data_directory, adathalmaz))
+    return {
+        'dataset': adathalmaz,
+        'countries': sorted(data['Country'].unique()),
+        'years': sorted(int(year) for year in data['Year'].unique()),
+        'pop_max': data['Population'].max() / 1e6,
+        'gdp_max': round(data['GDP'].max(), -3),
+    }
+
+
+# Tabváltás
+def tabvaltas(rng, ctx):
+    return dash_keres(ctx, 'tabs-content-example', 'children',
+                      [('tabs-example', 'value', rng.choice(TABOK)),
+                       ('dataset-dropdown', 'value', ctx['dataset'])],
+                      'tabs-example.value', dataset_state=False)
+
+
+# Legördülő menü választások (Tab 2, 4, 5, 7, 8)
+def legordulo(rng, ctx):
+    valasztas = rng.randrange(5)
+    if valasztas == 0:
+        return dash_keres(ctx, 'gdp-graph', 'figure',
+                          [('country-dropdown', 'value', rng.choice(ctx['countries'])),
+                           ('gdp-metric-radio', 'value', rng.choice(MUTATOK))],
+                          'country-dropdown.value')
+    if valasztas == 1:
+        orszagok = rng.sample(ctx['countries'], rng.randint(1, 4))
+        return dash_keres(ctx, 'life-expectancy-graph-container', 'children',
+                          [('multi-country-dropdown', 'value', orszagok),
+                           ('life-expectancy-metric-radio', 'value', rng.choice(MUTATOK))],
+                          'multi-country-dropdown.value')
+    if valasztas == 2:
+        return dash_keres(ctx, 'histogram-graph', 'figure',
+                          [('year-slider', 'value', rng.choice(ctx['years'])),
+                           ('variable-dropdown', 'value', rng.choice(VALTOZOK)),
+                           ('bins-input', 'value', 10)],
+                          'variable-dropdown.value')
+    if valasztas == 3:
+        return dash_keres(ctx, 'correlation-graph', 'figure',
+                          [('correlation-year-dropdown', 'value', rng.choice(ctx['years'] + ['all'])),
+                           ('correlation-method-radio', 'value', rng.choice(['pearson', 'spearman']))],
+                          'correlation-year-dropdown.value')
+    return dash_keres(ctx, 'regression-graph', 'figure',
+                      [('year-dropdown', 'value', rng.choice(ctx['years'])),
+                       ('degree-slider', 'value', 1)],
+                      'year-dropdown.value')
+
+
+# Csúszka húzások (Tab 3, 5, 7)
+def csuszka(rng, ctx):
+    valasztas = rng.randrange(3)
+    if valasztas == 0:
+        pop_also = rng.uniform(0, ctx['pop_max'] / 2)
+        gdp_also = rng.uniform(0, ctx['gdp_max'] / 2)
+        return dash_keres(ctx, 'filtered-countries', 'children',
+                          [('population-slider', 'value', [pop_also, rng.uniform(pop_also, ctx['pop_max'])]),
+                           ('gdp-slider', 'value', [gdp_also, rng.uniform(gdp_also, ctx['gdp_max'])])],
+                          rng.choice(['population-slider.value', 'gdp-slider.value']))
+    if valasztas == 1:
+        return dash_keres(ctx, 'histogram-graph', 'figure',
+                          [('year-slider', 'value', rng.choice(ctx['years'])),
+                           ('variable-dropdown', 'value', rng.choice(VALTOZOK)),
+                           ('bins-input', 'value', rng.randint(5, 50))],
+                          'year-slider.value')
+    return dash_keres(ctx, 'regression-graph', 'figure',
+                      [('year-dropdown', 'value', rng.choice(ctx['years'])),
+                       ('degree-slider', 'value', rng.randint(1, 5))],
+                      'degree-slider.value')
+
+
+# Tematikus térkép betöltése (Tab 6)
+def terkep(rng, ctx):
+    return dash_keres(ctx, 'choropleth-map', 'figure',
+                      [('map-variable-dropdown', 'value', rng.choice(VALTOZOK))],
+                      'map-variable-dropdown.value')
+
+
+# Vegyes forgalom: a valós használathoz hasonló arányokkal
+def vegyes(rng, ctx):
+    generator = rng.choices([tabvaltas, legordulo, csuszka, terkep], weights=[30, 35, 25, 10])[0]
+    return generator(rng, ctx)
+
+
+FORGATOKONYVEK = {
+    'tabvaltas': tabvaltas,
+    'legordulo': legordulo,
+    'csuszka': csuszka,
+    'terkep': terkep,
+    'vegyes': vegyes,
+}
+
+
+# Szabad port keresése a helyi szerverhez
+def szabad_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# A Dash alkalmazás elindítása gunicornnal, N tartósan futó workerrel.
+# (A Werkzeug forkoló szervere minden kéréshez új folyamatot indítana, így a workerenkénti
+# állapot, pl. az adathalmaz-nyilvántartás, elveszne, és a mérés nem egy többworkeres telepítést írna le.)
+# A szerver kimenete naplófájlba kerül, hogy induláskori hibánál meg tudjuk mutatni az okát.
+def szerver_inditasa(port, workers, naplo):
+    if importlib.util.find_spec('gunicorn') is None:
+        sys.exit('A helyi szerver indításához gunicorn szükséges (pip install -r requirements.txt), '
+                 'vagy adj meg egy már futó szervert a --url kapcsolóval.')
+    parancs = [sys.executable, '-m', 'gunicorn', '-w', str(workers),
+               '-b', f'127.0.0.1:{port}', 'KG6A2S:server']
+    print(f'Szerver indítása: gunicorn, {workers} worker, 127.0.0.1:{port} (napló: {naplo.name})', flush=True)
+    return subprocess.Popen(parancs, cwd=current_directory, stdout=naplo, stderr=subprocess.STDOUT)
+
+
+# Várakozás, amíg a szerver válaszol (ha közben leáll, nem várunk tovább)
+def szerverre_var(url, szerver=None, timeout=120):
+    hatarido = time.time() + timeout
+    while time.time() < hatarido:
+        if szerver is not None and szerver.poll() is not None:
+            raise RuntimeError(f'A szerver induláskor leállt (kilépési kód: {szerver.returncode})')
+        try:
+            if requests.get(url + '/_dash-layout', timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'A szerver nem válaszolt {timeout} másodpercen belül: {url}')
+
+
+# A szerver folyamatfa (master + workerek) memóriahasználatának mintavételezése
+class RssMintavetelezo(threading.Thread):
+    def __init__(self, pid, intervallum=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.intervallum = intervallum
+        self.max_osszes = 0
+        self.max_worker = 0
+        self._leallitas = threading.Event()
+
+    def run(self):
+        while not self._leallitas.is_set():
+            try:
+                szulo = psutil.Process(self.pid)
+                folyamatok = [szulo] + szulo.children(recursive=True)
+            except psutil.NoSuchProcess:
+                return
+            rss_lista = []
+            for folyamat in folyamatok:
+                try:
+                    rss_lista.append(folyamat.memory_info().rss)
+                except psutil.NoSuchProcess:
+                    pass
+            if rss_lista:
+                self.max_osszes = max(self.max_osszes, sum(rss_lista))
+                self.max_worker = max(self.max_worker, max(rss_lista))
+            self._leallitas.wait(self.intervallum)
+
+    def leallitas(self):
+        self._leallitas.set()
+        self.join()
+
+
+# Egy párhuzamossági szint lefuttatása egy forgatókönyvvel
+def szint_futtatasa(url, forgatokonyv, ctx, parhuzamossag, idotartam, seed, fejlecek=None):
+    eredmenyek = []
+    zar = threading.Lock()
+    hatarido = time.perf_counter() + idotartam
+
+    def kliens(index):
+        rng = random.Random(seed + index)
+        session = requests.Session()
+        session.headers.update(fejlecek or {})
+        helyi = []
+        while time.perf_counter() < hatarido:
+            torzs = forgatokonyv(rng, ctx)
+            kezdes = time.perf_counter()
+            try:
+                valasz = session.post(url + '/_dash-update-component', json=torzs, timeout=60)
+                sikeres = valasz.status_code in (200, 204)
+            except requests.RequestException:
+                sikeres = False
+            helyi.append((time.perf_counter() - kezdes, sikeres))
+        with zar:
+            eredmenyek.extend(helyi)
+
+    kezdes = time.perf_counter()
+    szalak = [threading.Thread(target=kliens, args=(i,)) for i in range(parhuzamossag)]
+    for szal in szalak:
+        szal.start()
+    for szal in szalak:
+        szal.join()
+    eltelt = time.perf_counter() - kezdes
+
+    if not eredmenyek:
+        return {'keresek': 0, 'atbocsatas': 0.0, 'p50_ms': None, 'p95_ms': None,
+                'p99_ms': None, 'hibaarany': 1.0}
+    kesleltetes = np.array([r[0] for r in eredmenyek]) * 1000
+    hibak = sum(1 for r in eredmenyek if not r[1])
+    p50, p95, p99 = np.percentile(kesleltetes, [50, 95, 99])
+    return {
+        'keresek': len(eredmenyek),
+        'atbocsatas': len(eredmenyek) / eltelt,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'hibaarany': hibak / len(eredmenyek),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Terheléses teszt a Dash alkalmazáshoz')
+    parser.add_argument('--url', help='Már futó szerver címe; ha nincs megadva, helyben indítunk egyet')
+    parser.add_argument('--pid', type=int, help='A már futó szerver PID-je a memóriaméréshez')
+    parser.add_argument('--adathalmaz', default=file_name, help='A terhelt adathalmaz fájlneve')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workerek száma (helyben indított szervernél)')
+    parser.add_argument('--forgatokonyvek', nargs='+', default=list(FORGATOKONYVEK),
+                        choices=list(FORGATOKONYVEK), help='Futtatandó forgatókönyvek')
+    parser.add_argument('--parhuzamossag', type=int, nargs='+', default=[1, 4, 16, 32],
+                        help='Párhuzamossági szintek (felfutás)')
+    parser.add_argument('--idotartam', type=float, default=10.0, help='Egy szint hossza másodpercben')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profilozas', action='store_true',
+                        help="'X-Profile: 1' fejléc küldése (PROFILOZAS=fejlec módban futó szerverhez)")
+    parser.add_argument('--json', help='Az eredmények mentése JSON fájlba')
+    parser.add_argument('--max-p95-ms', type=float, help='Kiadási kapu: megengedett p95 késleltetés')
+    parser.add_argument('--max-hibaarany', type=float, help='Kiadási kapu: megengedett hibaarány (0-1)')
+    args = parser.parse_args(argv)
+
+    ctx = kontextus_betoltese(args.adathalmaz)
+    szerver = naplo = None
+    if args.url:
+        url = args.url.rstrip('/')
+        pid = args.pid
+    else:
+        port = szabad_port()
+        url = f'http://127.0.0.1:{port}'
+        naplo = tempfile.NamedTemporaryFile('w+', prefix='terhelesi_teszt_szerver_', suffix='.log', delete=False)
+        szerver = szerver_inditasa(port, args.workers, naplo)
+        pid = szerver.pid
+
+    osszesites = []
+    try:
+        try:
+            szerverre_var(url, szerver)
+        except RuntimeError:
+            # Induláskori hibánál a szerver naplója mutatja az okot (importhiba, hibás beállítás...)
+            if naplo is not None:
+                naplo.flush()
+                naplo.seek(0)
+                print(naplo.read(), file=sys.stderr)
+            raise
+        print(f"{'forgatókönyv':<12} {'párh.':>5} {'kérés':>7} {'kérés/s':>8} {'p50 ms':>8} "
+              f"{'p95 ms':>8} {'p99 ms':>8} {'hiba %':>7} {'RSS MB':>8} {'worker MB':>10}")
+        for nev in args.forgatokonyvek:
+            forgatokonyv = FORGATOKONYVEK[nev]
+            for parhuzamossag in args.parhuzamossag:
+                mintavetelezo = RssMintavetelezo(pid) if pid else None
+                if mintavetelezo:
+                    mintavetelezo.start()
+                eredmeny = szint_futtatasa(url, forgatokonyv, ctx, parhuzamossag, args.idotartam, args.seed,
+                                            {'X-Profile': '1'} if args.profilozas else None)
+                if mintavetelezo:
+                    mintavetelezo.leallitas()
+                    eredmeny['rss_mb'] = mintavetelezo.max_osszes / 2**20
+                    eredmeny['worker_rss_mb'] = mintavetelezo.max_worker / 2**20
+                else:
+                    eredmeny['rss_mb'] = eredmeny['worker_rss_mb'] = None
+                eredmeny.update({'forgatokonyv': nev, 'parhuzamossag': parhuzamossag})
+                osszesites.append(eredmeny)
+
+                def fmt(ertek, szelesseg):
+                    return f'{ertek:>{szelesseg}.1f}' if ertek is not None else f"{'-':>{szelesseg}}"
+                print(f"{nev:<12} {parhuzamossag:>5} {eredmeny['keresek']:>7} {fmt(eredmeny['atbocsatas'], 8)} "
+                      f"{fmt(eredmeny['p50_ms'], 8)} {fmt(eredmeny['p95_ms'], 8)} {fmt(eredmeny['p99_ms'], 8)} "
+                      f"{eredmeny['hibaarany'] * 100:>7.2f} {fmt(eredmeny['rss_mb'], 8)} "
+                      f"{fmt(eredmeny['worker_rss_mb'], 10)}", flush=True)
+    finally:
+        if szerver is not None:
+            try:
+                for gyerek in psutil.Process(szerver.pid).children(recursive=True):
+                    gyerek.terminate()
+            except psutil.NoSuchProcess:
+                pass
+            szerver.terminate()
+            szerver.wait()
+        if naplo is not None:
+            naplo.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(osszesites, f, ensure_ascii=False, indent=2)
+
+    # Kiadási kapu ellenőrzése
+    sikertelen = False
+    for eredmeny in osszesites:
+        if args.max_p95_ms is not None and (eredmeny['p95_ms'] is None or eredmeny['p95_ms'] > args.max_p95_ms):
+            print(f"Kapu: túl nagy p95 késleltetés ({eredmeny['forgatokonyv']}, {eredmeny['parhuzamossag']})")
+            sikertelen = True
+        if args.max_hibaarany is not None and eredmeny['hibaarany'] > args.max_hibaarany:
+            print(f"Kapu: túl nagy hibaarány ({eredmeny['forgatokonyv']}, {eredmeny['parhuzamossag']})")
+            sikertelen = True
+    return 1 if sikertelen else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())